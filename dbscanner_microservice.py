@@ -1,14 +1,44 @@
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
+import orjson
 import pyodbc
+import queue
 import re
+import threading
 import yaml
+from cachetools import TTLCache
+from contextlib import contextmanager
 from flask_cors import CORS
 from loguru import logger
 import os
+import sys
+
+# Prefer the libyaml C loader; it parses the config several times faster than
+# the pure-Python loader and falls back cleanly where libyaml is absent.
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# Disable unixODBC's driver-level pooling; connections are reused through the
+# application-level pool below instead.
+pyodbc.pooling = False
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson, which serializes straight to bytes.
+
+    orjson keeps insertion order and never sorts keys, so the response field
+    order is preserved without any sort_keys configuration."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
 CORS(app)
-app.json.sort_keys = False
+app.json = OrjsonProvider(app)
 
 
 # Ensure the logs directory exists
@@ -16,12 +46,18 @@ log_directory = "logs"
 if not os.path.exists(log_directory):
     os.makedirs(log_directory)
 
+# Replace loguru's default DEBUG stderr sink so hot-path debug logging is
+# actually skipped outside development; LOG_LEVEL overrides it for debugging.
+logger.remove()
+logger.add(sys.stderr, level=os.environ.get("LOG_LEVEL", "INFO"))
+
 # Configure the logger to log to 'dbscanner.log'
 logger.add(
     os.path.join(log_directory, "dbscanner.log"),  # Log file path
     rotation="1 week",  # Log rotation based on time
     level="INFO",  # Log level
-    compression="zip"  # Optional: compress log files when rotated
+    compression="zip",  # Optional: compress log files when rotated
+    enqueue=True  # Write from a background thread so requests never block on IO
 )
 
 # Example of logging a test message
@@ -33,7 +69,7 @@ logger.info("Logger initialized successfully!")
 def load_config():
     try:
         with open("appconfig.yml", "r") as file:
-            return yaml.safe_load(file)
+            return yaml.load(file, Loader=SafeLoader)
     except Exception as e:
         logger.error(f"Error loading config file: {str(e)}")
         raise ValueError("Failed to load config file.")
@@ -62,91 +98,247 @@ def load_sql_query(filename):
 
 # Queries loaded from SQL files
 try:
-    metadata_query = load_sql_query("get_table_metadata.sql")
-    parent_foreign_key_query = load_sql_query("get_parent_foreign_keys.sql")
-    child_foreign_key_query = load_sql_query("get_child_foreign_keys.sql")
-    count_query = load_sql_query("get_record_count.sql")
+    neighborhood_query = load_sql_query("get_neighborhood.sql")
+    row_counts_query = load_sql_query("get_row_counts.sql")
 except ValueError as ve:
     logger.error(f"Query file loading failed: {str(ve)}")
     raise
 
+# Thread-safe pool of live database connections. Opening a pyodbc connection
+# costs a full TCP+TDS handshake, so keep up to POOL_SIZE of them alive and
+# hand them out per query instead of connecting on every helper call.
+POOL_SIZE = 8
+_connection_pool = queue.Queue(maxsize=POOL_SIZE)
+
+class PooledConnection:
+    """Pooled pyodbc connection that keeps one live cursor per SQL string.
+
+    Reusing the cursor lets the ODBC driver skip its prepare step on every
+    execution after the first and keeps SQL Server's compiled plan warm. The
+    query texts are fixed at import, so the cache stays tiny."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._prepared = {}
+
+    def execute(self, sql, params):
+        """Execute sql on its cached (prepared) cursor and return the cursor."""
+        cursor = self._prepared.get(sql)
+        if cursor is None:
+            cursor = self._conn.cursor()
+            # Let the ODBC driver fetch rows in bulk instead of one SQLFetch
+            # per row; catalog result sets are rarely larger than this.
+            cursor.arraysize = 256
+            self._prepared[sql] = cursor
+        cursor.execute(sql, params)
+        return cursor
+
+    def close(self):
+        self._prepared.clear()
+        self._conn.close()
+
+def _connect():
+    """Open a fresh pooled connection.
+
+    autocommit keeps the catalog SELECTs from opening an implicit transaction
+    that would otherwise be held open for as long as the connection sits in
+    the pool."""
+    return PooledConnection(pyodbc.connect(connection_string, autocommit=True))
+
+@contextmanager
+def get_connection():
+    """Borrow a pooled connection, creating a fresh one when the pool is empty."""
+    try:
+        conn = _connection_pool.get_nowait()
+        try:
+            # Idle pooled connections can be dropped by the server or a
+            # firewall; ping before use so a stale one is replaced instead
+            # of failing the request it was handed to.
+            conn.execute("SELECT 1", ())
+        except pyodbc.Error:
+            try:
+                conn.close()
+            except pyodbc.Error:
+                pass
+            conn = _connect()
+    except queue.Empty:
+        conn = _connect()
+    try:
+        yield conn
+    except pyodbc.Error:
+        # The connection may be in a bad state; drop it instead of
+        # returning it to the pool.
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+        raise
+    else:
+        try:
+            _connection_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+class DBScanError(Exception):
+    """Raised when a database query fails; the endpoint turns it into a 500."""
+
+# Compiled once at import; \A/\Z anchor the whole string so names with
+# embedded newlines can't sneak past the check.
+_NAME_RE = re.compile(r"\A[A-Za-z0-9_]+\Z")
+
 def sanitize_table_name(table_name):
     """Basic sanitization to prevent SQL injection"""
-    logger.info(f"Sanitizing table name: {table_name}")  # Log the table name
-    if not re.match("^[A-Za-z0-9_]+$", table_name):  # Basic alphanumeric validation
+    logger.opt(lazy=True).debug("Sanitizing table name: {}", lambda: table_name)
+    if not _NAME_RE.match(table_name):  # Basic alphanumeric validation
         logger.error(f"Invalid table name provided: {table_name}")
         raise ValueError("Invalid table name. Only alphanumeric characters and underscores are allowed.")
 
-def row_to_dict(row):
-    """Converts a pyodbc.Row object to a dictionary."""
-    return {column[0]: value for column, value in zip(row.cursor_description, row)}
+# The schema half of a neighborhood (columns and foreign keys) only changes
+# on DDL, so it is cached for minutes. Row counts drift much faster and get
+# their own short-lived per-table cache, shared across neighborhoods. Both
+# can be flushed via POST /cache/invalidate.
+NEIGHBORHOOD_CACHE_TTL = 300
+ROW_COUNT_CACHE_TTL = 60
+_neighborhood_cache = TTLCache(maxsize=512, ttl=NEIGHBORHOOD_CACHE_TTL)
+_row_count_cache = TTLCache(maxsize=4096, ttl=ROW_COUNT_CACHE_TTL)
+_cache_lock = threading.RLock()
 
-def get_table_metadata(table_name):
-    """Fetch metadata for a given table."""
-    logger.info(f"Fetching metadata for table: {table_name}")
-    try:
-        conn = pyodbc.connect(connection_string)
-        cursor = conn.cursor()
-        cursor.execute(metadata_query, (table_name, table_name, table_name))
-        metadata = cursor.fetchall()
-
-        formatted_metadata = []
-        for row in metadata:
-            formatted_metadata.append({
-                "COLUMN_NAME": row.COLUMN_NAME,
-                "DATA_TYPE": row.DATA_TYPE,
-                "CHARACTER_MAXIMUM_LENGTH": row.CHARACTER_MAXIMUM_LENGTH,
-                "PRIMARY_KEY": bool(row.PRIMARY_KEY),
-                "NULLABLE": bool(row.NULLABLE),
-                "IDENTITY": bool(row.IS_IDENTITY)
-            })
+def execute_multi(conn, sql, params):
+    """Execute a multi-statement batch and return one list of rows per result set."""
+    cursor = conn.execute(sql, params)
+    result_sets = [cursor.fetchall()]
+    while cursor.nextset():
+        result_sets.append(cursor.fetchall())
+    return result_sets
 
-        conn.close()
-        logger.info(f"Fetched metadata for table: {table_name}")
-        return formatted_metadata
-    except pyodbc.Error as e:
-        logger.error(f"Database error fetching table metadata for {table_name}: {str(e)}")
-        return str(e)
-    except Exception as e:
-        logger.error(f"Unexpected error fetching table metadata for {table_name}: {str(e)}")
-        return str(e)
+# Column order must match the metadata SELECT lists in get_neighborhood.sql.
+_METADATA_COLS = ("COLUMN_NAME", "DATA_TYPE", "CHARACTER_MAXIMUM_LENGTH",
+                  "PRIMARY_KEY", "NULLABLE", "IDENTITY")
 
-def get_foreign_keys(query, table_name):
-    """Get foreign keys for a given table using the provided query."""
-    logger.info(f"Fetching foreign keys for table: {table_name}")
-    try:
-        conn = pyodbc.connect(connection_string)
-        cursor = conn.cursor()
-        cursor.execute(query, (table_name,))
-        data = cursor.fetchall()
-        data = [row_to_dict(row) for row in data]
-        conn.close()
-        logger.info(f"Fetched foreign keys for table: {table_name}")
-        return data
-    except pyodbc.Error as e:
-        logger.error(f"Database error fetching foreign keys for {table_name}: {str(e)}")
-        return str(e)
-    except Exception as e:
-        logger.error(f"Unexpected error fetching foreign keys for {table_name}: {str(e)}")
-        return str(e)
+def format_metadata(metadata):
+    """Format raw metadata rows into the response column dictionaries.
 
-def get_record_count(table_name):
-    """Fetch the number of rows for a given table using the sys.dm_db_partition_stats view."""
-    logger.info(f"Fetching row count for table: {table_name}")
+    The flags arrive as bit columns (already Python bools), so the rows zip
+    straight into dicts without per-field conversion."""
+    return [dict(zip(_METADATA_COLS, row)) for row in metadata]
+
+def get_row_counts(table_names):
+    """Return approximate row counts ({table -> count}) for the given tables.
+
+    Counts are cached per table for ROW_COUNT_CACHE_TTL seconds; only the
+    missing names hit sys.dm_db_partition_stats, in one bulk statement."""
+    counts = {}
+    missing = []
+    with _cache_lock:
+        for name in table_names:
+            count = _row_count_cache.get(name)
+            if count is not None:
+                counts[name] = count
+            elif _NAME_RE.match(name):
+                missing.append(name)
+            else:
+                # Related names come straight from sys.tables and may contain
+                # the comma used as the list delimiter below; leave their
+                # count unknown rather than corrupt the whole batch.
+                logger.warning("Skipping row count for table name: {}", name)
+    if missing:
+        try:
+            with get_connection() as conn:
+                # A single comma-joined parameter keeps the statement text
+                # constant, so the prepared cursor is reused for any batch.
+                rows = conn.execute(row_counts_query, (",".join(missing),)).fetchall()
+        except pyodbc.Error as e:
+            logger.error(f"Database error fetching row counts: {str(e)}")
+            raise DBScanError(str(e)) from e
+        with _cache_lock:
+            for row in rows:
+                counts[row.TABLE_NAME] = row.TOTAL_ROWS
+                _row_count_cache[row.TABLE_NAME] = row.TOTAL_ROWS
+    return counts
+
+def _attach_row_counts(table_name, schema):
+    """Pair a (possibly cached) schema dict with fresh-enough row counts."""
+    if not schema["central_metadata"]:
+        return {**schema, "total_rows": {}}
+    return {
+        **schema,
+        "total_rows": get_row_counts((table_name, *schema["related_metadata"]))
+    }
+
+def get_neighborhood(table_name):
+    """Fetch the central table's columns, both foreign-key directions and
+    every related table's columns in one batched round-trip, then attach row
+    counts from their own shorter-lived cache.
+
+    Returns a dict with keys central_metadata, parent_foreign_keys,
+    child_foreign_keys, related_metadata (table -> columns) and total_rows
+    (table -> count, central table included)."""
+    with _cache_lock:
+        schema = _neighborhood_cache.get(table_name)
+    if schema is not None:
+        logger.debug("Neighborhood cache hit for table: {}", table_name)
+        return _attach_row_counts(table_name, schema)
+
+    logger.debug("Fetching neighborhood for table: {}", table_name)
     try:
-        conn = pyodbc.connect(connection_string)
-        cursor = conn.cursor()
-        cursor.execute(count_query, (table_name,))
-        count = cursor.fetchone()[0]
-        conn.close()
-        logger.info(f"Fetched row count for table: {table_name}: {count}")
-        return count
+        with get_connection() as conn:
+            central_rows, constraint_rows, related_rows = execute_multi(
+                conn, neighborhood_query,
+                # the batch binds the name once into @t and reuses it
+                (table_name,)
+            )
+        logger.debug("Fetched neighborhood for table: {}", table_name)
     except pyodbc.Error as e:
-        logger.error(f"Database error fetching row count for {table_name}: {str(e)}")
-        return str(e)
-    except Exception as e:
-        logger.error(f"Unexpected error fetching row count for {table_name}: {str(e)}")
-        return str(e)
+        logger.error(f"Database error fetching neighborhood for {table_name}: {str(e)}")
+        raise DBScanError(str(e)) from e
+
+    parent_foreign_keys = []
+    child_foreign_keys = []
+    for row in constraint_rows:
+        if row.Direction == 'parent':
+            parent_foreign_keys.append({
+                "ConstraintName": row.ConstraintName,
+                "ParentTable": row.ChildTable,
+                "ParentColumn": row.ChildColumn,
+                "ReferencedTable": row.ReferencedTable,
+                "ReferencedColumn": row.ReferencedColumn
+            })
+        else:
+            child_foreign_keys.append({
+                "ConstraintName": row.ConstraintName,
+                "ChildTable": row.ChildTable,
+                "ChildColumn": row.ChildColumn,
+                "ReferencedTable": row.ReferencedTable,
+                "ReferencedColumn": row.ReferencedColumn
+            })
+
+    # Related-table rows carry the table name in column 0, followed by the
+    # usual metadata columns; bucket them per table.
+    related_metadata = {}
+    for row in related_rows:
+        related_metadata.setdefault(row[0], []).append(dict(zip(_METADATA_COLS, row[1:])))
+
+    schema = {
+        "central_metadata": format_metadata(central_rows),
+        "parent_foreign_keys": parent_foreign_keys,
+        "child_foreign_keys": child_foreign_keys,
+        "related_metadata": related_metadata
+    }
+    # Don't cache unknown tables; empty central metadata means the table is
+    # missing from the catalog and the caller turns that into a 400.
+    if schema["central_metadata"]:
+        with _cache_lock:
+            _neighborhood_cache[table_name] = schema
+    return _attach_row_counts(table_name, schema)
+
+@app.route('/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    """Endpoint to flush the metadata caches after DDL changes."""
+    with _cache_lock:
+        _neighborhood_cache.clear()
+        _row_count_cache.clear()
+    logger.info("Metadata caches invalidated.")
+    return jsonify({"status": "cache invalidated"}), 200
 
 @app.route('/get_metadata', methods=['GET'])
 def get_metadata():
@@ -163,12 +355,21 @@ def get_metadata():
         logger.error(f"Invalid table name in request: {table_name}")
         return jsonify({"error": str(ve)}), 400
 
-    # Get metadata for the central table
-    central_metadata = get_table_metadata(table_name)
-    if isinstance(central_metadata, str):  # Error occurred
+    # One batched round-trip covers the central table, its foreign keys in
+    # both directions, the related tables' columns and all row counts
+    try:
+        neighborhood = get_neighborhood(table_name)
+    except DBScanError as e:
         logger.error(f"Error fetching metadata for table: {table_name}")
-        return jsonify({"error": central_metadata}), 500
-    
+        return jsonify({"error": str(e)}), 500
+
+    central_metadata = neighborhood["central_metadata"]
+    parent_foreign_keys = neighborhood["parent_foreign_keys"]
+    child_foreign_keys = neighborhood["child_foreign_keys"]
+    related_metadata = neighborhood["related_metadata"]
+    row_counts = neighborhood["total_rows"]
+    total_rows = row_counts.get(table_name)
+
     if not central_metadata:
         response_data = {
             "central_table_metadata": [],
@@ -182,9 +383,6 @@ def get_metadata():
 
          
 
-    # Get the row count for the central table
-    total_rows = get_record_count(table_name)
-
     # Format central table metadata to include the table name and row count
     central_metadata_with_table_name = {
         "table_name": table_name,
@@ -192,68 +390,70 @@ def get_metadata():
         "columns": central_metadata
     }
 
-    # Get parent foreign keys and their metadata
-    parent_foreign_keys = get_foreign_keys(parent_foreign_key_query, table_name)
-    parent_metadata = []
-    parent_constraints = []
-    if parent_foreign_keys:
-        logger.info(f"Found {len(parent_foreign_keys)} parent foreign keys for table: {table_name}")
-        for parent in parent_foreign_keys:
-            parent_table = parent['ReferencedTable']
-            parent_table_metadata = get_table_metadata(parent_table)
-            parent_table_rows = get_record_count(parent_table)  # Get row count for parent table
-            if not isinstance(parent_table_metadata, str):
-                parent_metadata.append({
-                    "table_name": parent_table,
-                    "total_rows": parent_table_rows,
-                    "columns": parent_table_metadata
-                })
-            
-            # Add constraint details in the preferred order
-            parent_constraints.append({
-                "ConstraintName": parent.get('ConstraintName'),
-                "ChildTable": parent.get('ParentTable'),
-                "ChildColumn": parent.get('ParentColumn'),
-                "ReferencedTable": parent.get('ReferencedTable'),
-                "ReferencedColumn": parent.get('ReferencedColumn')
-            })
+    # Deduplicate the table lists for the response; the details themselves
+    # already arrived with the neighborhood.
+    parent_tables = list(dict.fromkeys(parent['ReferencedTable'] for parent in parent_foreign_keys))
+    child_tables = list(dict.fromkeys(child['ChildTable'] for child in child_foreign_keys))
 
-    # Get child foreign keys and their metadata
-    child_foreign_keys = get_foreign_keys(child_foreign_key_query, table_name)
-    child_metadata = []
-    child_constraints = []
-    if child_foreign_keys:
-        logger.info(f"Found {len(child_foreign_keys)} child foreign keys for table: {table_name}")
-        for child in child_foreign_keys:
-            child_table = child['ChildTable']
-            child_table_metadata = get_table_metadata(child_table)
-            child_table_rows = get_record_count(child_table)  # Get row count for child table
-            if not isinstance(child_table_metadata, str):
-                child_metadata.append({
-                    "table_name": child_table,
-                    "total_rows": child_table_rows,
-                    "columns": child_table_metadata
-                })
-            
-            # Add constraint details in the preferred order
-            child_constraints.append({
-                "ConstraintName": child.get('ConstraintName'),
-                "ChildTable": child.get('ChildTable'),
-                "ChildColumn": child.get('ChildColumn'),
-                "ReferencedTable": child.get('ReferencedTable'),
-                "ReferencedColumn": child.get('ReferencedColumn')
-            })
+    logger.debug("Found {} parent foreign keys for table: {}", len(parent_foreign_keys), table_name)
+    logger.debug("Found {} child foreign keys for table: {}", len(child_foreign_keys), table_name)
+
+    # Project the fetched details and constraints into the response with
+    # comprehensions; constraint details keep the preferred field order.
+    parent_metadata = [
+        {
+            "table_name": parent_table,
+            "total_rows": row_counts.get(parent_table),
+            "columns": related_metadata[parent_table]
+        }
+        for parent_table in parent_tables
+        if parent_table in related_metadata
+    ]
+    parent_constraints = [
+        {
+            "ConstraintName": parent.get('ConstraintName'),
+            "ChildTable": parent.get('ParentTable'),
+            "ChildColumn": parent.get('ParentColumn'),
+            "ReferencedTable": parent.get('ReferencedTable'),
+            "ReferencedColumn": parent.get('ReferencedColumn')
+        }
+        for parent in parent_foreign_keys
+    ]
+
+    child_metadata = [
+        {
+            "table_name": child_table,
+            "total_rows": row_counts.get(child_table),
+            "columns": related_metadata[child_table]
+        }
+        for child_table in child_tables
+        if child_table in related_metadata
+    ]
+    child_constraints = [
+        {
+            "ConstraintName": child.get('ConstraintName'),
+            "ChildTable": child.get('ChildTable'),
+            "ChildColumn": child.get('ChildColumn'),
+            "ReferencedTable": child.get('ReferencedTable'),
+            "ReferencedColumn": child.get('ReferencedColumn')
+        }
+        for child in child_foreign_keys
+    ]
 
-    # Combine all metadata
+    # Combine all metadata; the unpacking builds the combined constraint list
+    # in one allocation instead of concatenating two lists.
     response_data = {
         "central_table_metadata": [central_metadata_with_table_name],
         "parent_tables_metadata": parent_metadata,
         "child_tables_metadata": child_metadata,
-        "constraint_details": parent_constraints + child_constraints
+        "constraint_details": [*parent_constraints, *child_constraints]
     }
 
     logger.info(f"Returning metadata for table: {table_name}")
     return jsonify(response_data), 200
 
-if __name__ == "__main__":
+# The Werkzeug dev server (reloader, debugger, single process) is only for
+# local debugging; in production run under gunicorn instead:
+#   gunicorn -c gunicorn.conf.py dbscanner_microservice:app
+if __name__ == "__main__" and os.environ.get("FLASK_DEBUG"):
     app.run(debug=True, host='0.0.0.0')
@@ -1,11 +1,28 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, make_response
 from flask_restx import Api, Resource, fields
+import orjson
 import pyodbc
+import queue
 import re
+import threading
 import yaml
+from cachetools import TTLCache
+from contextlib import contextmanager
 from flask_cors import CORS
 from loguru import logger
 import os
+import sys
+
+# Prefer the libyaml C loader; it parses the config several times faster than
+# the pure-Python loader and falls back cleanly where libyaml is absent.
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# Disable unixODBC's driver-level pooling; connections are reused through the
+# application-level pool below instead.
+pyodbc.pooling = False
 
 # Initialize Flask app and extensions
 app = Flask(__name__)
@@ -24,17 +41,31 @@ api = Api(
 # Namespace for metadata-related operations
 ns_metadata = api.namespace("", description="Database Metadata Operations")
 
+@api.representation("application/json")
+def output_json(data, code, headers=None):
+    """Serialize responses with orjson instead of the stdlib json module."""
+    response = make_response(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS), code)
+    response.headers.extend(headers or {})
+    response.mimetype = "application/json"
+    return response
+
 # Ensure the logs directory exists
 log_directory = "logs"
 if not os.path.exists(log_directory):
     os.makedirs(log_directory)
 
+# Replace loguru's default DEBUG stderr sink so hot-path debug logging is
+# actually skipped outside development; LOG_LEVEL overrides it for debugging.
+logger.remove()
+logger.add(sys.stderr, level=os.environ.get("LOG_LEVEL", "INFO"))
+
 # Configure the logger
 logger.add(
     os.path.join(log_directory, "dbscanner.log"),
     rotation="1 week",
     level="INFO",
-    compression="zip"
+    compression="zip",
+    enqueue=True  # Write from a background thread so requests never block on IO
 )
 logger.info("Logger initialized successfully!")
 
@@ -42,7 +73,7 @@ logger.info("Logger initialized successfully!")
 def load_config():
     try:
         with open("appconfig.yml", "r") as file:
-            return yaml.safe_load(file)
+            return yaml.load(file, Loader=SafeLoader)
     except Exception as e:
         logger.error(f"Error loading config file: {str(e)}")
         raise ValueError("Failed to load config file.")
@@ -70,61 +101,233 @@ def load_sql_query(filename):
         raise ValueError(f"Failed to load query file: {filename}")
 
 try:
-    metadata_query = load_sql_query("get_table_metadata.sql")
-    parent_foreign_key_query = load_sql_query("get_parent_foreign_keys.sql")
-    child_foreign_key_query = load_sql_query("get_child_foreign_keys.sql")
-    count_query = load_sql_query("get_record_count.sql")
+    neighborhood_query = load_sql_query("get_neighborhood.sql")
+    row_counts_query = load_sql_query("get_row_counts.sql")
 except ValueError as ve:
     logger.error(f"Query file loading failed: {str(ve)}")
     raise
 
+# Thread-safe pool of live database connections, reused across requests to
+# avoid a TCP+TDS handshake per helper call.
+POOL_SIZE = 8
+_connection_pool = queue.Queue(maxsize=POOL_SIZE)
+
+class PooledConnection:
+    """Pooled pyodbc connection that keeps one live cursor per SQL string.
+
+    Reusing the cursor lets the ODBC driver skip its prepare step on every
+    execution after the first and keeps SQL Server's compiled plan warm. The
+    query texts are fixed at import, so the cache stays tiny."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._prepared = {}
+
+    def execute(self, sql, params):
+        """Execute sql on its cached (prepared) cursor and return the cursor."""
+        cursor = self._prepared.get(sql)
+        if cursor is None:
+            cursor = self._conn.cursor()
+            # Let the ODBC driver fetch rows in bulk instead of one SQLFetch
+            # per row; catalog result sets are rarely larger than this.
+            cursor.arraysize = 256
+            self._prepared[sql] = cursor
+        cursor.execute(sql, params)
+        return cursor
+
+    def close(self):
+        self._prepared.clear()
+        self._conn.close()
+
+def _connect():
+    """Open a fresh pooled connection.
+
+    autocommit keeps the catalog SELECTs from opening an implicit transaction
+    that would otherwise be held open for as long as the connection sits in
+    the pool."""
+    return PooledConnection(pyodbc.connect(connection_string, autocommit=True))
+
+@contextmanager
+def get_connection():
+    """Borrow a pooled connection, creating a fresh one when the pool is empty."""
+    try:
+        conn = _connection_pool.get_nowait()
+        try:
+            # Idle pooled connections can be dropped by the server or a
+            # firewall; ping before use so a stale one is replaced instead
+            # of failing the request it was handed to.
+            conn.execute("SELECT 1", ())
+        except pyodbc.Error:
+            try:
+                conn.close()
+            except pyodbc.Error:
+                pass
+            conn = _connect()
+    except queue.Empty:
+        conn = _connect()
+    try:
+        yield conn
+    except pyodbc.Error:
+        # The connection may be in a bad state; drop it instead of
+        # returning it to the pool.
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+        raise
+    else:
+        try:
+            _connection_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+class DBScanError(Exception):
+    """Raised when a database query fails; the endpoint turns it into a 500."""
+
+# Compiled once at import; \A/\Z anchor the whole string so names with
+# embedded newlines can't sneak past the check.
+_NAME_RE = re.compile(r"\A[A-Za-z0-9_]+\Z")
+
 # Helper functions
 def sanitize_table_name(table_name):
     """Basic sanitization to prevent SQL injection."""
-    if not re.match("^[A-Za-z0-9_]+$", table_name):
+    if not _NAME_RE.match(table_name):
         raise ValueError("Invalid table name. Only alphanumeric characters and underscores are allowed.")
 
-def row_to_dict(row):
-    """Converts a pyodbc.Row object to a dictionary."""
-    return {column[0]: value for column, value in zip(row.cursor_description, row)}
-
-def get_table_metadata(table_name):
-    """Fetch metadata for a given table."""
-    conn = pyodbc.connect(connection_string)
-    cursor = conn.cursor()
-    cursor.execute(metadata_query, (table_name, table_name, table_name))
-    metadata = cursor.fetchall()
-    formatted_metadata = [
-        {
-            "COLUMN_NAME": row.COLUMN_NAME,
-            "DATA_TYPE": row.DATA_TYPE,
-            "CHARACTER_MAXIMUM_LENGTH": row.CHARACTER_MAXIMUM_LENGTH,
-            "PRIMARY_KEY": bool(row.PRIMARY_KEY),
-            "NULLABLE": bool(row.NULLABLE),
-            "IDENTITY": bool(row.IS_IDENTITY)
-        }
-        for row in metadata
-    ]
-    conn.close()
-    return formatted_metadata
-
-def get_foreign_keys(query, table_name):
-    """Get foreign keys for a given table using the provided query."""
-    conn = pyodbc.connect(connection_string)
-    cursor = conn.cursor()
-    cursor.execute(query, (table_name,))
-    data = cursor.fetchall()
-    conn.close()
-    return [row_to_dict(row) for row in data]
-
-def get_record_count(table_name):
-    """Fetch the number of rows for a given table."""
-    conn = pyodbc.connect(connection_string)
-    cursor = conn.cursor()
-    cursor.execute(count_query, (table_name,))
-    count = cursor.fetchone()[0]
-    conn.close()
-    return count
+# The schema half of a neighborhood (columns and foreign keys) only changes
+# on DDL, so it is cached for minutes. Row counts drift much faster and get
+# their own short-lived per-table cache, shared across neighborhoods. Both
+# can be flushed via POST /cache/invalidate.
+NEIGHBORHOOD_CACHE_TTL = 300
+ROW_COUNT_CACHE_TTL = 60
+_neighborhood_cache = TTLCache(maxsize=512, ttl=NEIGHBORHOOD_CACHE_TTL)
+_row_count_cache = TTLCache(maxsize=4096, ttl=ROW_COUNT_CACHE_TTL)
+_cache_lock = threading.RLock()
+
+def execute_multi(conn, sql, params):
+    """Execute a multi-statement batch and return one list of rows per result set."""
+    cursor = conn.execute(sql, params)
+    result_sets = [cursor.fetchall()]
+    while cursor.nextset():
+        result_sets.append(cursor.fetchall())
+    return result_sets
+
+# Column order must match the metadata SELECT lists in get_neighborhood.sql.
+_METADATA_COLS = ("COLUMN_NAME", "DATA_TYPE", "CHARACTER_MAXIMUM_LENGTH",
+                  "PRIMARY_KEY", "NULLABLE", "IDENTITY")
+
+def format_metadata(metadata):
+    """Format raw metadata rows into the response column dictionaries.
+
+    The flags arrive as bit columns (already Python bools), so the rows zip
+    straight into dicts without per-field conversion."""
+    return [dict(zip(_METADATA_COLS, row)) for row in metadata]
+
+def get_row_counts(table_names):
+    """Return approximate row counts ({table -> count}) for the given tables.
+
+    Counts are cached per table for ROW_COUNT_CACHE_TTL seconds; only the
+    missing names hit sys.dm_db_partition_stats, in one bulk statement."""
+    counts = {}
+    missing = []
+    with _cache_lock:
+        for name in table_names:
+            count = _row_count_cache.get(name)
+            if count is not None:
+                counts[name] = count
+            elif _NAME_RE.match(name):
+                missing.append(name)
+            else:
+                # Related names come straight from sys.tables and may contain
+                # the comma used as the list delimiter below; leave their
+                # count unknown rather than corrupt the whole batch.
+                logger.warning("Skipping row count for table name: {}", name)
+    if missing:
+        try:
+            with get_connection() as conn:
+                # A single comma-joined parameter keeps the statement text
+                # constant, so the prepared cursor is reused for any batch.
+                rows = conn.execute(row_counts_query, (",".join(missing),)).fetchall()
+        except pyodbc.Error as e:
+            logger.error(f"Database error fetching row counts: {str(e)}")
+            raise DBScanError(str(e)) from e
+        with _cache_lock:
+            for row in rows:
+                counts[row.TABLE_NAME] = row.TOTAL_ROWS
+                _row_count_cache[row.TABLE_NAME] = row.TOTAL_ROWS
+    return counts
+
+def _attach_row_counts(table_name, schema):
+    """Pair a (possibly cached) schema dict with fresh-enough row counts."""
+    if not schema["central_metadata"]:
+        return {**schema, "total_rows": {}}
+    return {
+        **schema,
+        "total_rows": get_row_counts((table_name, *schema["related_metadata"]))
+    }
+
+def get_neighborhood(table_name):
+    """Fetch the central table's columns, both foreign-key directions and
+    every related table's columns in one batched round-trip, then attach row
+    counts from their own shorter-lived cache.
+
+    Returns a dict with keys central_metadata, parent_foreign_keys,
+    child_foreign_keys, related_metadata (table -> columns) and total_rows
+    (table -> count, central table included)."""
+    with _cache_lock:
+        schema = _neighborhood_cache.get(table_name)
+    if schema is not None:
+        return _attach_row_counts(table_name, schema)
+
+    try:
+        with get_connection() as conn:
+            central_rows, constraint_rows, related_rows = execute_multi(
+                conn, neighborhood_query,
+                # the batch binds the name once into @t and reuses it
+                (table_name,)
+            )
+    except pyodbc.Error as e:
+        logger.error(f"Database error fetching neighborhood for {table_name}: {str(e)}")
+        raise DBScanError(str(e)) from e
+
+    parent_foreign_keys = []
+    child_foreign_keys = []
+    for row in constraint_rows:
+        if row.Direction == 'parent':
+            parent_foreign_keys.append({
+                "ConstraintName": row.ConstraintName,
+                "ParentTable": row.ChildTable,
+                "ParentColumn": row.ChildColumn,
+                "ReferencedTable": row.ReferencedTable,
+                "ReferencedColumn": row.ReferencedColumn
+            })
+        else:
+            child_foreign_keys.append({
+                "ConstraintName": row.ConstraintName,
+                "ChildTable": row.ChildTable,
+                "ChildColumn": row.ChildColumn,
+                "ReferencedTable": row.ReferencedTable,
+                "ReferencedColumn": row.ReferencedColumn
+            })
+
+    # Related-table rows carry the table name in column 0, followed by the
+    # usual metadata columns; bucket them per table.
+    related_metadata = {}
+    for row in related_rows:
+        related_metadata.setdefault(row[0], []).append(dict(zip(_METADATA_COLS, row[1:])))
+
+    schema = {
+        "central_metadata": format_metadata(central_rows),
+        "parent_foreign_keys": parent_foreign_keys,
+        "child_foreign_keys": child_foreign_keys,
+        "related_metadata": related_metadata
+    }
+    # Don't cache unknown tables; empty central metadata means the table is
+    # missing from the catalog.
+    if schema["central_metadata"]:
+        with _cache_lock:
+            _neighborhood_cache[table_name] = schema
+    return _attach_row_counts(table_name, schema)
 
 # API Models
 table_metadata_model = api.model("TableMetadata", {
@@ -149,6 +352,17 @@ metadata_response_model = api.model("MetadataResponse", {
 })
 
 # API Endpoints
+@ns_metadata.route("/cache/invalidate")
+class CacheInvalidate(Resource):
+    @api.response(200, "Success")
+    def post(self):
+        """Flush the metadata caches after DDL changes."""
+        with _cache_lock:
+            _neighborhood_cache.clear()
+            _row_count_cache.clear()
+        logger.info("Metadata caches invalidated.")
+        return {"status": "cache invalidated"}, 200
+
 @ns_metadata.route("/metadata")
 class Metadata(Resource):
     @api.response(200, "Success", metadata_response_model)
@@ -166,35 +380,49 @@ class Metadata(Resource):
             return {"error": str(ve)}, 400
 
         try:
-            central_metadata = get_table_metadata(table_name)
-            total_rows = get_record_count(table_name)
+            # One batched round-trip covers the central table, its foreign
+            # keys in both directions, the related tables' columns and all
+            # row counts.
+            neighborhood = get_neighborhood(table_name)
+            central_metadata = neighborhood["central_metadata"]
+            parent_foreign_keys = neighborhood["parent_foreign_keys"]
+            child_foreign_keys = neighborhood["child_foreign_keys"]
+            related_metadata = neighborhood["related_metadata"]
+            row_counts = neighborhood["total_rows"]
             central_table = {
                 "table_name": table_name,
-                "total_rows": total_rows,
+                "total_rows": row_counts.get(table_name),
                 "columns": central_metadata
             }
 
-            parent_foreign_keys = get_foreign_keys(parent_foreign_key_query, table_name)
+            # Deduplicate the table lists for the response; the details
+            # themselves already arrived with the neighborhood.
+            parent_names = list(dict.fromkeys(key["ReferencedTable"] for key in parent_foreign_keys))
+            child_names = list(dict.fromkeys(key["ChildTable"] for key in child_foreign_keys))
+
             parent_tables = [
                 {
-                    "table_name": key["ReferencedTable"],
-                    "total_rows": get_record_count(key["ReferencedTable"]),
-                    "columns": get_table_metadata(key["ReferencedTable"])
+                    "table_name": name,
+                    "total_rows": row_counts.get(name),
+                    "columns": related_metadata[name]
                 }
-                for key in parent_foreign_keys
+                for name in parent_names
+                if name in related_metadata
             ]
 
-            child_foreign_keys = get_foreign_keys(child_foreign_key_query, table_name)
             child_tables = [
                 {
-                    "table_name": key["ChildTable"],
-                    "total_rows": get_record_count(key["ChildTable"]),
-                    "columns": get_table_metadata(key["ChildTable"])
+                    "table_name": name,
+                    "total_rows": row_counts.get(name),
+                    "columns": related_metadata[name]
                 }
-                for key in child_foreign_keys
+                for name in child_names
+                if name in related_metadata
             ]
 
-            constraints = parent_foreign_keys + child_foreign_keys
+            # Unpacking builds the combined list in one allocation instead of
+            # concatenating two lists.
+            constraints = [*parent_foreign_keys, *child_foreign_keys]
 
             return {
                 "central_table_metadata": [central_table],
@@ -202,10 +430,15 @@ class Metadata(Resource):
                 "child_tables_metadata": child_tables,
                 "constraint_details": constraints
             }, 200
+        except DBScanError as e:
+            logger.error(f"Error fetching metadata for table: {table_name}")
+            return {"error": str(e)}, 500
         except Exception as e:
             logger.error(f"Error fetching metadata: {str(e)}")
             return {"error": "Internal server error"}, 500
 
-# Run the app
-if __name__ == "__main__":
+# The Werkzeug dev server (reloader, debugger, single process) is only for
+# local debugging; in production run under gunicorn instead:
+#   gunicorn -c gunicorn.conf.py dbscanner_microservice_flask_restx:app
+if __name__ == "__main__" and os.environ.get("FLASK_DEBUG"):
     app.run(debug=True, host="0.0.0.0")
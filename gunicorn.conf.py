@@ -0,0 +1,11 @@
+"""Gunicorn settings for the DB scanner service.
+
+Run with: gunicorn -c gunicorn.conf.py dbscanner_microservice:app
+"""
+import multiprocessing
+
+bind = "0.0.0.0:5000"
+workers = 2 * multiprocessing.cpu_count() + 1
+worker_class = "gthread"
+threads = 8  # matches POOL_SIZE so every worker thread can hold a pooled connection
+keepalive = 30
@@ -0,0 +1,92 @@
+-- Three result sets in one batch: central-table columns, foreign keys in both
+-- directions tagged with their direction, and columns for every related table.
+-- Row counts live in get_row_counts.sql so they can be cached separately.
+-- The table name is bound once into @t instead of repeating the parameter in
+-- every statement; variables declared here are visible to the whole batch.
+DECLARE @t sysname = ?;
+
+-- 1. Central table columns
+SELECT
+    c.COLUMN_NAME,
+    c.DATA_TYPE,
+    c.CHARACTER_MAXIMUM_LENGTH,
+    CAST(CASE WHEN EXISTS (
+        SELECT 1
+        FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
+        JOIN INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+            ON kcu.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+        WHERE tc.TABLE_NAME = c.TABLE_NAME
+          AND tc.CONSTRAINT_TYPE = 'PRIMARY KEY'
+          AND kcu.COLUMN_NAME = c.COLUMN_NAME
+    ) THEN 1 ELSE 0 END AS bit) AS PRIMARY_KEY,
+    CAST(CASE WHEN c.IS_NULLABLE = 'YES' THEN 1 ELSE 0 END AS bit) AS NULLABLE,
+    CAST(col.is_identity AS bit) AS [IDENTITY]
+FROM INFORMATION_SCHEMA.COLUMNS c
+JOIN sys.columns col
+    ON col.name = c.COLUMN_NAME
+    AND col.object_id = OBJECT_ID(@t)
+WHERE c.TABLE_NAME = @t;
+
+-- 2. Foreign keys in both directions ('parent' rows reference tables the
+--    central table points at; 'child' rows reference tables pointing at it)
+SELECT CAST('parent' AS varchar(6)) AS Direction,
+       fk.name AS ConstraintName,
+       tp.name AS ChildTable, cp.name AS ChildColumn,
+       tr.name AS ReferencedTable, cr.name AS ReferencedColumn
+FROM sys.foreign_keys AS fk
+JOIN sys.foreign_key_columns AS fkc ON fk.object_id = fkc.constraint_object_id
+JOIN sys.tables AS tp ON fkc.parent_object_id = tp.object_id
+JOIN sys.columns AS cp ON fkc.parent_object_id = cp.object_id AND fkc.parent_column_id = cp.column_id
+JOIN sys.tables AS tr ON fkc.referenced_object_id = tr.object_id
+JOIN sys.columns AS cr ON fkc.referenced_object_id = cr.object_id AND fkc.referenced_column_id = cr.column_id
+WHERE tp.name = @t
+UNION ALL
+SELECT CAST('child' AS varchar(6)),
+       fk.name,
+       tp.name, cp.name,
+       tr.name, cr.name
+FROM sys.foreign_keys AS fk
+JOIN sys.foreign_key_columns AS fkc ON fk.object_id = fkc.constraint_object_id
+JOIN sys.tables AS tp ON fkc.parent_object_id = tp.object_id
+JOIN sys.columns AS cp ON fkc.parent_object_id = cp.object_id AND fkc.parent_column_id = cp.column_id
+JOIN sys.tables AS tr ON fkc.referenced_object_id = tr.object_id
+JOIN sys.columns AS cr ON fkc.referenced_object_id = cr.object_id AND fkc.referenced_column_id = cr.column_id
+WHERE tr.name = @t;
+
+-- 3. Columns for every table related to the central table by a foreign key
+WITH RelatedTables AS (
+    SELECT tr.name AS name
+    FROM sys.foreign_keys AS fk
+    JOIN sys.tables AS tp ON fk.parent_object_id = tp.object_id
+    JOIN sys.tables AS tr ON fk.referenced_object_id = tr.object_id
+    WHERE tp.name = @t
+    UNION
+    SELECT tp.name
+    FROM sys.foreign_keys AS fk
+    JOIN sys.tables AS tp ON fk.parent_object_id = tp.object_id
+    JOIN sys.tables AS tr ON fk.referenced_object_id = tr.object_id
+    WHERE tr.name = @t
+)
+SELECT
+    rt.name AS TABLE_NAME,
+    c.COLUMN_NAME,
+    c.DATA_TYPE,
+    c.CHARACTER_MAXIMUM_LENGTH,
+    CAST(CASE WHEN EXISTS (
+        SELECT 1
+        FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
+        JOIN INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+            ON kcu.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+        WHERE tc.TABLE_NAME = c.TABLE_NAME
+          AND tc.CONSTRAINT_TYPE = 'PRIMARY KEY'
+          AND kcu.COLUMN_NAME = c.COLUMN_NAME
+    ) THEN 1 ELSE 0 END AS bit) AS PRIMARY_KEY,
+    CAST(CASE WHEN c.IS_NULLABLE = 'YES' THEN 1 ELSE 0 END AS bit) AS NULLABLE,
+    CAST(col.is_identity AS bit) AS [IDENTITY]
+FROM RelatedTables rt
+JOIN INFORMATION_SCHEMA.COLUMNS c
+    ON c.TABLE_NAME = rt.name
+JOIN sys.columns col
+    ON col.name = c.COLUMN_NAME
+    AND col.object_id = OBJECT_ID(rt.name)
+ORDER BY rt.name;
@@ -1,10 +0,0 @@
-SELECT fk.name AS ConstraintName, 
-       tp.name AS ParentTable, cp.name AS ParentColumn, 
-       tr.name AS ReferencedTable, cr.name AS ReferencedColumn
-FROM sys.foreign_keys AS fk
-JOIN sys.foreign_key_columns AS fkc ON fk.object_id = fkc.constraint_object_id
-JOIN sys.tables AS tp ON fkc.parent_object_id = tp.object_id
-JOIN sys.columns AS cp ON fkc.parent_object_id = cp.object_id AND fkc.parent_column_id = cp.column_id
-JOIN sys.tables AS tr ON fkc.referenced_object_id = tr.object_id
-JOIN sys.columns AS cr ON fkc.referenced_object_id = cr.object_id AND fkc.referenced_column_id = cr.column_id
-WHERE tp.name = ?;
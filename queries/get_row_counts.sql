@@ -0,0 +1,11 @@
+-- Approximate row counts for a batch of tables, read from
+-- sys.dm_db_partition_stats (no table scan). The single parameter is a
+-- comma-separated list of table names so the statement text stays constant
+-- and its prepared cursor and server-side plan are reused for any batch size.
+SELECT OBJECT_NAME(ps.object_id) AS TABLE_NAME, SUM(ps.row_count) AS TOTAL_ROWS
+FROM sys.dm_db_partition_stats ps
+WHERE ps.index_id <= 1
+  AND ps.object_id IN (
+      SELECT OBJECT_ID(LTRIM(value)) FROM STRING_SPLIT(?, ',')
+  )
+GROUP BY ps.object_id;
@@ -27,7 +27,14 @@ class TestApp(unittest.TestCase):
 
     def test_table_not_found(self):
         """Test if the API returns an error when the table doesn't exist in the catalog."""
-        with patch('dbscanner_microservice.get_table_metadata', return_value=[]):
+        empty_neighborhood = {
+            "central_metadata": [],
+            "parent_foreign_keys": [],
+            "child_foreign_keys": [],
+            "related_metadata": {},
+            "total_rows": {}
+        }
+        with patch('dbscanner_microservice.get_neighborhood', return_value=empty_neighborhood):
             response = self.client.get('/get_metadata?table_name=nonexistent_table')
             self.assertEqual(response.status_code, 400)
             self.assertIn('error', response.json)
@@ -43,23 +50,29 @@ class TestApp(unittest.TestCase):
             "NULLABLE": False,
             "IDENTITY": True
         }]
-        with patch('dbscanner_microservice.get_table_metadata', return_value=mock_metadata):
-            with patch('dbscanner_microservice.get_record_count', return_value=100):
-                response = self.client.get('/get_metadata?table_name=valid_table')
-                self.assertEqual(response.status_code, 200)
-                self.assertIn('central_table_metadata', response.json)
-                self.assertEqual(response.json['central_table_metadata'][0]['table_name'], 'valid_table')
-                self.assertEqual(response.json['central_table_metadata'][0]['total_rows'], 100)
-                self.assertEqual(len(response.json['parent_tables_metadata']), 0)
-                self.assertEqual(len(response.json['child_tables_metadata']), 0)
+        mock_neighborhood = {
+            "central_metadata": mock_metadata,
+            "parent_foreign_keys": [],
+            "child_foreign_keys": [],
+            "related_metadata": {},
+            "total_rows": {"valid_table": 100}
+        }
+        with patch('dbscanner_microservice.get_neighborhood', return_value=mock_neighborhood):
+            response = self.client.get('/get_metadata?table_name=valid_table')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('central_table_metadata', response.json)
+            self.assertEqual(response.json['central_table_metadata'][0]['table_name'], 'valid_table')
+            self.assertEqual(response.json['central_table_metadata'][0]['total_rows'], 100)
+            self.assertEqual(len(response.json['parent_tables_metadata']), 0)
+            self.assertEqual(len(response.json['child_tables_metadata']), 0)
 
-def test_database_error(self):
-    """Test if the API handles database connection errors gracefully."""
-    with patch('pyodbc.connect', side_effect=pyodbc.Error('Database connection error')):
-        response = self.client.get('/get_metadata?table_name=valid_table')
-        self.assertEqual(response.status_code, 500)
-        self.assertIn('error', response.json)
-        self.assertIn('Database error', response.json['error'])  # Partial match
+    def test_database_error(self):
+        """Test if the API handles database connection errors gracefully."""
+        with patch('pyodbc.connect', side_effect=pyodbc.Error('Database connection error')):
+            response = self.client.get('/get_metadata?table_name=valid_table')
+            self.assertEqual(response.status_code, 500)
+            self.assertIn('error', response.json)
+            self.assertIn('Database connection error', response.json['error'])  # Partial match
 
     def test_valid_table_with_foreign_keys(self):
         """Test if the API returns metadata for a table with foreign keys."""
@@ -78,15 +91,20 @@ def test_database_error(self):
             'ReferencedTable': 'referenced_table',
             'ReferencedColumn': 'referenced_id'
         }]
-        with patch('dbscanner_microservice.get_table_metadata', return_value=mock_metadata):
-            with patch('dbscanner_microservice.get_foreign_keys', side_effect=lambda query, table_name: mock_parent_foreign_keys if 'parent' in table_name else []):
-                with patch('dbscanner_microservice.get_record_count', return_value=100):
-                    response = self.client.get('/get_metadata?table_name=child_table')
-                    self.assertEqual(response.status_code, 200)
-                    self.assertIn('parent_tables_metadata', response.json)
-                    self.assertEqual(len(response.json['parent_tables_metadata']), 1)
-                    self.assertEqual(response.json['parent_tables_metadata'][0]['table_name'], 'parent_table')
-                    self.assertEqual(len(response.json['child_tables_metadata']), 0)
+        mock_neighborhood = {
+            "central_metadata": mock_metadata,
+            "parent_foreign_keys": mock_parent_foreign_keys,
+            "child_foreign_keys": [],
+            "related_metadata": {"referenced_table": mock_metadata},
+            "total_rows": {"child_table": 100, "referenced_table": 100}
+        }
+        with patch('dbscanner_microservice.get_neighborhood', return_value=mock_neighborhood):
+            response = self.client.get('/get_metadata?table_name=child_table')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('parent_tables_metadata', response.json)
+            self.assertEqual(len(response.json['parent_tables_metadata']), 1)
+            self.assertEqual(response.json['parent_tables_metadata'][0]['table_name'], 'referenced_table')
+            self.assertEqual(len(response.json['child_tables_metadata']), 0)
 
 if __name__ == '__main__':
     unittest.main()